@@ -1,11 +1,21 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, case, null, select, exists
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import selectinload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from flask_session import Session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from collections import Counter
+from functools import lru_cache
 import os
 import json
+import shutil
+import redis
+from rq import Queue
 from config import Config
 
 app = Flask(__name__)
@@ -16,6 +26,13 @@ db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'user_login'
 login_manager.login_message_category = 'info'
+redis_client = redis.Redis.from_url(app.config['REDIS_URL'])
+# Background jobs; process with `rq worker notifications`
+notification_queue = Queue('notifications', connection=redis_client)
+
+# Server-side sessions stored in Redis
+app.config['SESSION_REDIS'] = redis_client
+Session(app)
 
 # Create upload folder
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -40,19 +57,33 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 class Product(db.Model):
+    __table_args__ = (db.Index('ix_product_avail_breed', 'is_available', 'breed'),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    breed = db.Column(db.String(100))
+    breed = db.Column(db.String(100), index=True)
     gender = db.Column(db.String(10))
     age = db.Column(db.String(20))
     price = db.Column(db.Float, nullable=False)
     description = db.Column(db.Text)
-    image_urls = db.Column(db.JSON)  # store list of image paths
+    legacy_image_urls = db.Column('image_urls', db.JSON)  # superseded by ProductImage rows
     additional_details = db.Column(db.JSON)  # For dynamic product details
     rating = db.Column(db.Float, default=0.0)
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     orders = db.relationship('OrderItem', backref='product', lazy=True)
+    images = db.relationship('ProductImage', backref='product', lazy='selectin',
+                             order_by='ProductImage.position', cascade='all, delete-orphan')
+
+    @property
+    def image_urls(self):
+        return [image.url for image in self.images]
+
+class ProductImage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    url = db.Column(db.String(255), nullable=False)
+    position = db.Column(db.Integer, default=0)
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -89,24 +120,138 @@ class SiteSettings(db.Model):
     social_links = db.Column(db.JSON)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+USER_CACHE_FIELDS = ('id', 'username', 'email', 'phone', 'address', 'is_admin')
+
+
+def _attach_cached(instance):
+    """Attach an instance rebuilt from cached column values to the session.
+
+    Attributes that were not cached (and relationships) lazy-load on access.
+    If the session already holds that row, the existing instance is returned.
+    """
+    make_transient_to_detached(instance)
+    return db.session.merge(instance, load=False)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Serve the per-request user lookup from Redis; the password hash is never cached
+    key = f'user:{user_id}'
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            return _attach_cached(User(**json.loads(cached)))
+    except redis.RedisError:
+        pass
+
+    user = User.query.get(int(user_id))
+    if user:
+        try:
+            redis_client.setex(key, 60, json.dumps({field: getattr(user, field) for field in USER_CACHE_FIELDS}))
+        except redis.RedisError:
+            pass
+    return user
+
+
+@lru_cache(maxsize=1024)
+def _normalize_breed(raw):
+    """Trim and title-case a breed name; blank input gives None."""
+    if not raw:
+        return None
+    return raw.strip().title() or None
+
+
+def _cleaned_breeds():
+    """Query distinct breeds and return them trimmed, title-cased and de-duplicated."""
+    raw_breeds = db.session.query(Product.breed).distinct().filter(Product.breed.isnot(None)).order_by(Product.breed)
+    seen = set()
+    cleaned = []
+    for (r,) in raw_breeds:
+        c = _normalize_breed(r)
+        if c and c not in seen:
+            seen.add(c)
+            cleaned.append(c)
+    return cleaned
+
+
+def get_cached_breeds():
+    """Return the cleaned, unique breed list, served from Redis when possible."""
+    key = None
+    try:
+        version = int(redis_client.get('breeds:ver') or 0)
+        key = f'breeds:v1:{version}'
+        cached = redis_client.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except redis.RedisError:
+        pass
+
+    cleaned = _cleaned_breeds()
+    if key:
+        try:
+            redis_client.set(key, json.dumps(cleaned), ex=3600)
+        except redis.RedisError:
+            pass
+    return cleaned
+
+
+def invalidate_breeds():
+    """Bump the breed list version so the next read rebuilds it."""
+    try:
+        redis_client.incr('breeds:ver')
+    except redis.RedisError:
+        pass
+
+
+def get_cached_product(product_id):
+    """Return a product for display, served from Redis when possible.
+
+    Cache hits rebuild the Product row and its images and attach them to the
+    session, so templates get the same object whether or not the cache hit.
+    """
+    key = f'product:{product_id}'
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            data = json.loads(cached)
+            images = [ProductImage(**image) for image in data.pop('images')]
+            if data['created_at']:
+                data['created_at'] = datetime.fromisoformat(data['created_at'])
+            product = Product(**data)
+            for image in images:
+                make_transient_to_detached(image)
+            set_committed_value(product, 'images', images)
+            return _attach_cached(product)
+    except redis.RedisError:
+        pass
+
+    product = Product.query.get_or_404(product_id)
+    data = {attr.key: getattr(product, attr.key) for attr in sa_inspect(Product).column_attrs}
+    data['created_at'] = product.created_at.isoformat() if product.created_at else None
+    data['images'] = [
+        {attr.key: getattr(image, attr.key) for attr in sa_inspect(ProductImage).column_attrs}
+        for image in product.images
+    ]
+    try:
+        redis_client.setex(key, 300, json.dumps(data))
+    except redis.RedisError:
+        pass
+    return product
+
+
+def invalidate_product(product_id):
+    """Drop the cached copy of a product after it changes."""
+    try:
+        redis_client.delete(f'product:{product_id}')
+    except redis.RedisError:
+        pass
 
 
 @app.context_processor
 def inject_breeds():
     # Provide cleaned, unique list of breeds to all templates
     try:
-        raw_breeds = [b[0] for b in db.session.query(Product.breed).filter(Product.breed.isnot(None)).all()]
-        cleaned = []
-        for r in raw_breeds:
-            if not r:
-                continue
-            c = r.strip().title()
-            if c and c not in cleaned:
-                cleaned.append(c)
-        return {'breeds': cleaned}
+        return {'breeds': get_cached_breeds()}
     except Exception:
         return {'breeds': []}
 
@@ -120,28 +265,87 @@ def inject_current_time():
         return {'current_time': datetime.now()}
 
 
+# Per-process (version, SiteSettings row) pair, refreshed when the Redis version changes.
+# Replaced in one assignment so worker threads never see a version with another row.
+_settings_cache = (None, None)
+
+
 @app.context_processor
 def inject_site_settings():
     """Expose site settings to all templates as `site_settings` (may be None)."""
+    global _settings_cache
     try:
+        try:
+            version = redis_client.get('settings:v') or b'0'
+        except redis.RedisError:
+            version = None
+        cached_version, cached_settings = _settings_cache
+        if version is not None and version == cached_version:
+            return {'site_settings': cached_settings}
+
         settings = SiteSettings.query.first()
+        if settings:
+            # Detach so later commits in other requests cannot expire the cached copy
+            db.session.expunge(settings)
+        _settings_cache = (version, settings)
         return {'site_settings': settings}
     except Exception:
         return {'site_settings': None}
 
 # Utility functions
-def generate_order_number():
-    from datetime import datetime
-    return f"VELY{datetime.now().strftime('%Y%m%d%H%M%S')}"
+def get_cached_dashboard_stats():
+    """Return admin dashboard counts from one aggregate query, cached in Redis for 30s."""
+    try:
+        cached = redis_client.get('admin:stats')
+        if cached is not None:
+            return json.loads(cached)
+    except redis.RedisError:
+        pass
+
+    total_orders, pending_orders, total_products, total_users = db.session.query(
+        func.count(Order.id),
+        func.coalesce(func.sum(case((Order.status == 'pending', 1), else_=0)), 0),
+        select(func.count()).select_from(Product).scalar_subquery(),
+        select(func.count()).select_from(User).scalar_subquery()
+    ).one()
+    stats = {
+        'total_orders': total_orders,
+        'pending_orders': pending_orders,
+        'total_products': total_products,
+        'total_users': total_users
+    }
+    try:
+        redis_client.setex('admin:stats', 30, json.dumps(stats))
+    except redis.RedisError:
+        pass
+    return stats
+
+def migrate_legacy_image_urls():
+    """Move image paths from the old Product.image_urls JSON column into ProductImage rows."""
+    for product in Product.query.filter(Product.legacy_image_urls.isnot(None)).all():
+        urls = product.legacy_image_urls or []
+        if isinstance(urls, str):
+            urls = [u for u in urls.split(',') if u]
+        if not product.images:
+            product.images = [ProductImage(url=url, position=i) for i, url in enumerate(urls)]
+        product.legacy_image_urls = null()
+    db.session.commit()
+
+def generate_order_number(order_id):
+    # Built from the order's primary key, so it is unique even when several
+    # orders land in the same second
+    return f"VELY{datetime.utcnow():%Y%m%d}{order_id:08d}"
 
-def send_order_email(order):
+def send_order_email(order_id):
     # Placeholder for email sending functionality
     # You would implement this with your email service
+    # Runs on an RQ worker: load the order inside `with app.app_context():`
     pass
 
-def send_whatsapp_notification(order):
+def send_whatsapp_notification(order_id):
     # Placeholder for WhatsApp notification
     # You would implement this with Twilio or similar service
+    # Runs on an RQ worker: load the order inside `with app.app_context():`
     pass
 
 # Routes
@@ -153,41 +357,27 @@ def index():
 @app.route('/puppies')
 def puppies():
     # Only show products that have a breed assigned by default
-    breed = request.args.get('breed')
+    # normalize incoming breed parameter to match stored format
+    breed = _normalize_breed(request.args.get('breed'))
     if breed:
-        # normalize incoming breed parameter to match stored format
-        breed = breed.strip().title()
         products = Product.query.filter_by(breed=breed, is_available=True).all()
     else:
         products = Product.query.filter(Product.breed.isnot(None), Product.is_available==True).all()
 
-    # build cleaned unique breed list
-    raw_breeds = [b[0] for b in db.session.query(Product.breed).filter(Product.breed.isnot(None)).all()]
-    cleaned = []
-    for r in raw_breeds:
-        if not r:
-            continue
-        c = r.strip().title()
-        if c and c not in cleaned:
-            cleaned.append(c)
-
     return render_template('product/products.html', 
                          products=products, 
-                         breeds=cleaned)
+                         breeds=get_cached_breeds())
 
 @app.route('/product/<int:product_id>')
 def product_detail(product_id):
-    product = Product.query.get_or_404(product_id)
+    product = get_cached_product(product_id)
     return render_template('product/product_detail.html', product=product)
 
 @app.route('/checkout', methods=['GET', 'POST'])
 def checkout():
     if request.method == 'POST':
         # Process order
-        order_number = generate_order_number()
-        
         order = Order(
-            order_number=order_number,
             customer_name=request.form.get('name'),
             customer_email=request.form.get('email'),
             customer_phone=request.form.get('phone'),
@@ -201,24 +391,29 @@ def checkout():
             order.user_id = current_user.id
         
         db.session.add(order)
+        db.session.flush()  # assigns order.id for the order number and item rows
+        order.order_number = generate_order_number(order.id)
         
         # Add order items (simplified - in reality you'd get from cart)
-        product_id = request.form.get('product_id')
-        if product_id:
-            product = Product.query.get(product_id)
-            order_item = OrderItem(
-                order=order,
-                product_id=product_id,
-                quantity=1,
-                price=product.price
-            )
-            db.session.add(order_item)
+        quantities = Counter(int(pid) for pid in request.form.getlist('product_id') if pid)
+        if quantities:
+            prices = dict(db.session.query(Product.id, Product.price).filter(Product.id.in_(quantities)))
+            items = [
+                OrderItem(order_id=order.id, product_id=pid, quantity=qty, price=prices[pid])
+                for pid, qty in quantities.items() if pid in prices
+            ]
+            db.session.bulk_save_objects(items)
         
         db.session.commit()
         
-        # Send notifications
-        send_order_email(order)
-        send_whatsapp_notification(order)
+        # Send notifications in the background; jobs are enqueued by import path so
+        # workers can resolve them even when the app runs as __main__
+        try:
+            notification_queue.enqueue('app.send_order_email', order.id)
+            notification_queue.enqueue('app.send_whatsapp_notification', order.id)
+        except redis.RedisError:
+            send_order_email(order.id)
+            send_whatsapp_notification(order.id)
         
         flash('Order placed successfully! Admin will contact you for payment processing.', 'success')
         return redirect(url_for('index'))
@@ -260,11 +455,16 @@ def register():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        if User.query.filter_by(username=username).first():
+        username_taken, email_taken = db.session.query(
+            exists().where(User.username == username),
+            exists().where(User.email == email)
+        ).one()
+        
+        if username_taken:
             flash('Username already exists', 'danger')
             return redirect(url_for('register'))
         
-        if User.query.filter_by(email=email).first():
+        if email_taken:
             flash('Email already registered', 'danger')
             return redirect(url_for('register'))
         
@@ -313,14 +513,10 @@ def admin_dashboard():
         flash('Access denied', 'danger')
         return redirect(url_for('index'))
     
-    stats = {
-        'total_orders': Order.query.count(),
-        'pending_orders': Order.query.filter_by(status='pending').count(),
-        'total_products': Product.query.count(),
-        'total_users': User.query.count()
-    }
+    stats = get_cached_dashboard_stats()
     
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
+    recent_orders = Order.query.options(selectinload(Order.items).selectinload(OrderItem.product))\
+        .order_by(Order.created_at.desc()).limit(10).all()
     
     return render_template('admin/dashboard.html', stats=stats, orders=recent_orders)
 
@@ -372,6 +568,10 @@ def admin_site_settings():
             settings.social_links = social_links
 
         db.session.commit()
+        try:
+            redis_client.incr('settings:v')
+        except redis.RedisError:
+            pass
         flash('Site settings updated', 'success')
         return redirect(url_for('admin_site_settings'))
 
@@ -385,14 +585,18 @@ def admin_products():
         return redirect(url_for('index'))
     
     # Load products and compute simple stats for the admin products view
-    products = Product.query.order_by(Product.created_at.desc()).all()
-    available_products = Product.query.filter_by(is_available=True).count()
-    male_puppies = Product.query.filter(Product.gender.in_(['Male', 'male', 'M', 'm'])).count()
-    female_puppies = Product.query.filter(Product.gender.in_(['Female', 'female', 'F', 'f'])).count()
-    total_value = sum([p.price or 0 for p in products])
+    page = request.args.get('page', 1, type=int)
+    pagination = Product.query.order_by(Product.created_at.desc()).paginate(page=page, per_page=50, error_out=False)
+    total_value, available_products, male_puppies, female_puppies = db.session.query(
+        func.coalesce(func.sum(Product.price), 0),
+        func.coalesce(func.sum(case((Product.is_available == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Product.gender.in_(['Male', 'male', 'M', 'm']), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Product.gender.in_(['Female', 'female', 'F', 'f']), 1), else_=0)), 0)
+    ).one()
 
     return render_template('admin/products.html', 
-                           products=products,
+                           products=pagination.items,
+                           pagination=pagination,
                            available_products=available_products,
                            male_puppies=male_puppies,
                            female_puppies=female_puppies,
@@ -411,18 +615,10 @@ def add_product():
         image_urls = []
         for image_file in image_files:
             if image_file and allowed_file(image_file.filename):
-                filename = secure_filename(image_file.filename)
-                image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                image_file.save(image_path)
-                image_urls.append(f'uploads/{filename}')
+                image_urls.append(save_image_upload(image_file))
         
         # Normalize breed (trim/case) and process additional details
-        raw_breed = request.form.get('breed')
-        breed = None
-        if raw_breed:
-            breed = raw_breed.strip()
-            if breed:
-                breed = breed.title()
+        breed = _normalize_breed(request.form.get('breed'))
 
         # Process additional details
         additional_details = {}
@@ -441,26 +637,19 @@ def add_product():
             price=float(request.form.get('price')),
             rating=float(request.form.get('rating') or 0.0),
             description=request.form.get('description'),
-            image_urls=image_urls,
+            images=[ProductImage(url=url, position=i) for i, url in enumerate(image_urls)],
             additional_details=additional_details
         )
         
         db.session.add(product)
         db.session.commit()
+        invalidate_breeds()
         
         flash('Product added successfully', 'success')
         return redirect(url_for('admin_products'))
     
     # pass existing breeds for suggestions (clean, unique, sorted)
-    raw_breeds = [b[0] for b in db.session.query(Product.breed).all() if b[0]]
-    cleaned = []
-    for r in raw_breeds:
-        if not r:
-            continue
-        c = r.strip().title()
-        if c and c not in cleaned:
-            cleaned.append(c)
-    return render_template('admin/add_product.html', breeds=cleaned)
+    return render_template('admin/add_product.html', breeds=get_cached_breeds())
 
 @app.route('/admin/product/edit/<int:product_id>', methods=['GET', 'POST'])
 @login_required
@@ -474,12 +663,7 @@ def edit_product(product_id):
     if request.method == 'POST':
         product.name = request.form.get('name')
         # Normalize breed input
-        raw_breed = request.form.get('breed')
-        if raw_breed:
-            b = raw_breed.strip()
-            product.breed = b.title() if b else None
-        else:
-            product.breed = None
+        product.breed = _normalize_breed(request.form.get('breed'))
         product.gender = request.form.get('gender')
         product.age = request.form.get('age')
         product.price = float(request.form.get('price'))
@@ -493,15 +677,12 @@ def edit_product(product_id):
         # Handle file upload
         # allow adding more images; keep existing ones
         image_files = request.files.getlist('images')
-        if image_files:
-            existing = product.image_urls or []
-            for image_file in image_files:
-                if image_file and allowed_file(image_file.filename):
-                    filename = secure_filename(image_file.filename)
-                    image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                    image_file.save(image_path)
-                    existing.append(f'uploads/{filename}')
-            product.image_urls = existing
+        # continue after the highest position; deletions leave gaps, so the count could collide
+        position = max((i.position or 0) for i in product.images) + 1 if product.images else 0
+        for image_file in image_files:
+            if image_file and allowed_file(image_file.filename):
+                product.images.append(ProductImage(url=save_image_upload(image_file), position=position))
+                position += 1
         
         # Process additional details
         additional_details = {}
@@ -515,18 +696,12 @@ def edit_product(product_id):
         product.additional_details = additional_details
         
         db.session.commit()
+        invalidate_breeds()
+        invalidate_product(product_id)
         flash('Product updated successfully', 'success')
         return redirect(url_for('admin_products'))
     
-    raw_breeds = [b[0] for b in db.session.query(Product.breed).all() if b[0]]
-    cleaned = []
-    for r in raw_breeds:
-        if not r:
-            continue
-        c = r.strip().title()
-        if c and c not in cleaned:
-            cleaned.append(c)
-    return render_template('admin/edit_product.html', product=product, breeds=cleaned)
+    return render_template('admin/edit_product.html', product=product, breeds=get_cached_breeds())
 
 @app.route('/admin/product/delete/<int:product_id>', methods=['POST'])
 @login_required
@@ -537,6 +712,8 @@ def delete_product(product_id):
     product = Product.query.get_or_404(product_id)
     db.session.delete(product)
     db.session.commit()
+    invalidate_breeds()
+    invalidate_product(product_id)
     
     return jsonify({'success': True})
 
@@ -547,32 +724,22 @@ def delete_product_image(product_id):
     if not current_user.is_admin:
         return jsonify({'success': False, 'message': 'Access denied'}), 403
 
-    product = Product.query.get_or_404(product_id)
     data = request.get_json() or {}
     filename = data.get('filename')
     if not filename:
         return jsonify({'success': False, 'message': 'No filename provided'}), 400
 
-    imgs = product.image_urls or []
-    if isinstance(imgs, str):
-        imgs_list = [i for i in imgs.split(',') if i]
-    else:
-        imgs_list = list(imgs)
-
-    if filename not in imgs_list:
+    image = ProductImage.query.filter_by(product_id=product_id, url=filename).first()
+    if not image:
         return jsonify({'success': False, 'message': 'Image not found on product'}), 404
 
-    imgs_list.remove(filename)
-    if isinstance(imgs, str):
-        product.image_urls = ','.join(imgs_list)
-    else:
-        product.image_urls = imgs_list
-
+    db.session.delete(image)
     try:
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': 'Database update failed'}), 500
+    invalidate_product(product_id)
 
     # Delete file from disk
     try:
@@ -591,8 +758,10 @@ def admin_orders():
         flash('Access denied', 'danger')
         return redirect(url_for('index'))
     
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    return render_template('admin/orders.html', orders=orders)
+    page = request.args.get('page', 1, type=int)
+    pagination = Order.query.options(selectinload(Order.items).selectinload(OrderItem.product))\
+        .order_by(Order.created_at.desc()).paginate(page=page, per_page=50, error_out=False)
+    return render_template('admin/orders.html', orders=pagination.items, pagination=pagination)
 
 @app.route('/admin/order/<int:order_id>')
 @login_required
@@ -601,7 +770,7 @@ def view_order(order_id):
         flash('Access denied', 'danger')
         return redirect(url_for('index'))
     
-    order = Order.query.get_or_404(order_id)
+    order = Order.query.options(selectinload(Order.items).selectinload(OrderItem.product)).get_or_404(order_id)
     return render_template('admin/view_order.html', order=order)
 
 @app.route('/admin/order/update_status/<int:order_id>', methods=['POST'])
@@ -637,31 +806,59 @@ def update_order_payment_status(order_id):
 
     return jsonify({'error': 'Invalid payment status'}), 400
 
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'})
+
 def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'}
+    ext = os.path.splitext(filename)[1][1:].lower()
+    return ext in ALLOWED_EXTENSIONS
+
+def save_image_upload(image_file):
+    """Write an uploaded image to the upload folder and return its static path."""
+    filename = secure_filename(image_file.filename)
+    image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    # 1MB chunks keep the syscall count low; no fsync, the page cache handles write-back
+    with open(image_path, 'wb') as f:
+        shutil.copyfileobj(image_file.stream, f, length=1 << 20)
+    return f'uploads/{filename}'
+
+def init_db():
+    """Create missing tables, migrate legacy data and ensure the admin user exists.
+
+    Must run on every deploy/upgrade: `python app.py` and the gunicorn
+    on_starting hook call it; otherwise run `flask --app app init-db`.
+    """
+    db.create_all()
+    # create_all() skips tables that already exist; add indexes declared since
+    for index in Product.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    migrate_legacy_image_urls()
+    # Create admin user if not exists
+    if not User.query.filter_by(username=app.config.get('ADMIN_USERNAME')).first():
+        # Determine a safe admin email: prefer ADMIN_EMAIL, then CONTACT_EMAIL, then a generated default
+        admin_email = app.config.get('ADMIN_EMAIL') or app.config.get('CONTACT_EMAIL')
+        if not admin_email:
+            admin_username = app.config.get('ADMIN_USERNAME') or 'admin'
+            admin_email = f"{admin_username}@gmail.com"
+
+        admin = User(
+            username=app.config.get('ADMIN_USERNAME') or 'admin',
+            email=admin_email,
+            is_admin=True
+        )
+        # Ensure an admin password exists; if not, use a fallback and log a warning
+        admin_password = app.config.get('ADMIN_PASSWORD') or 'change_me'
+        admin.set_password(admin_password)
+        db.session.add(admin)
+        db.session.commit()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create tables, migrate legacy data and ensure the admin user exists."""
+    init_db()
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        # Create admin user if not exists
-        if not User.query.filter_by(username=app.config.get('ADMIN_USERNAME')).first():
-            # Determine a safe admin email: prefer ADMIN_EMAIL, then CONTACT_EMAIL, then a generated default
-            admin_email = app.config.get('ADMIN_EMAIL') or app.config.get('CONTACT_EMAIL')
-            if not admin_email:
-                admin_username = app.config.get('ADMIN_USERNAME') or 'admin'
-                admin_email = f"{admin_username}@gmail.com"
-
-            admin = User(
-                username=app.config.get('ADMIN_USERNAME') or 'admin',
-                email=admin_email,
-                is_admin=True
-            )
-            # Ensure an admin password exists; if not, use a fallback and log a warning
-            admin_password = app.config.get('ADMIN_PASSWORD') or 'change_me'
-            admin.set_password(admin_password)
-            db.session.add(admin)
-            db.session.commit()
+        init_db()
     # Use configurable host/port from config; default port 5000
     host = app.config.get('HOST', '0.0.0.0')
     port = int(app.config.get('PORT'))
@@ -7,6 +7,20 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # The pool is per process: one connection per gunicorn worker thread.
+    # pre_ping/recycle only matter for server databases (no effect on SQLite).
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('GUNICORN_THREADS', 4)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+    # Redis (caching)
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Server-side sessions (Flask-Session)
+    SESSION_TYPE = 'redis'
+    SESSION_PERMANENT = False
     
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -0,0 +1,27 @@
+import multiprocessing
+import os
+
+# Run with: gunicorn app:app  (this file is picked up automatically)
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))  # also sizes the DB pool (config.py)
+
+# Import the app once in the master; workers fork with the SQLAlchemy engine
+# already built (no connections are opened before the fork).
+preload_app = True
+
+timeout = 30
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Schema + data migrations (new tables such as product_image, legacy image
+    # lists) must run before workers serve requests; the app's queries assume them.
+    from app import app, db, init_db
+    with app.app_context():
+        init_db()
+        # Don't fork workers holding the master's connections
+        db.engine.dispose()